@@ -0,0 +1,510 @@
+import sqlite3
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = 'banco.db'
+CAIXA_ID = f"{socket.gethostname()}-{os.getpid()}"
+RESERVA_TTL = 15 * 60
+TENTATIVAS_CAS = 5
+SNAPSHOT_A_CADA = 500
+RETENCAO_MOVIMENTOS_DIAS = 365
+PASTA_ARQUIVO = 'arquivo_vendas'
+MESES_VENDAS_QUENTES = 2
+MAX_PARTICOES_ANEXADAS = 8
+
+def criar_tabela():
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    # WAL deixa os caixas lerem enquanto outro grava
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS produtos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            preco REAL NOT NULL,
+            estoque INTEGER NOT NULL,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("PRAGMA table_info(produtos)")
+    if "versao" not in [coluna[1] for coluna in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE produtos ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+    criar_tabelas_venda(cursor)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reservas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            caixa TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            expira_em REAL NOT NULL,
+            UNIQUE (produto_id, caixa),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reservas_expira_em ON reservas(expira_em)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS movimentos_estoque (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            data_hora TEXT NOT NULL,
+            referencia TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_produto ON movimentos_estoque(produto_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_data_hora ON movimentos_estoque(data_hora)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS snapshots_estoque (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produto_id INTEGER NOT NULL,
+            data_hora TEXT NOT NULL,
+            estoque INTEGER NOT NULL,
+            ultimo_movimento_id INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_produto ON snapshots_estoque(produto_id, data_hora)")
+    # Produtos anteriores ao livro de movimentos partem de um snapshot com o estoque atual
+    cursor.execute("""
+        INSERT INTO snapshots_estoque (produto_id, data_hora, estoque, ultimo_movimento_id)
+        SELECT id, ?, estoque, 0 FROM produtos
+        WHERE id NOT IN (SELECT produto_id FROM snapshots_estoque)
+          AND id NOT IN (SELECT produto_id FROM movimentos_estoque)
+    """, (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    conn.commit()
+    conn.close()
+
+def criar_tabelas_venda(cursor, esquema="main"):
+    """Cria vendas e itens_venda no banco principal ou numa partição anexada."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {esquema}.vendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_hora TEXT NOT NULL,
+            total REAL NOT NULL
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {esquema}.itens_venda (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            venda_id INTEGER,
+            produto_id INTEGER,
+            quantidade INTEGER,
+            subtotal REAL,
+            FOREIGN KEY (venda_id) REFERENCES vendas(id),
+            FOREIGN KEY (produto_id) REFERENCES produtos(id)
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {esquema}.idx_vendas_data_hora ON vendas(data_hora)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {esquema}.idx_itens_venda_venda ON itens_venda(venda_id)")
+
+def formatar_data_hora(momento):
+    if isinstance(momento, datetime):
+        return momento.strftime("%Y-%m-%d %H:%M:%S")
+    return momento
+
+def obter_produto_por_id(produto_id):
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, nome, preco, estoque FROM produtos WHERE id=?", (produto_id,))
+    produto = cursor.fetchone()
+    conn.close()
+    return produto
+
+def gravar_movimentos(cursor, movimentos):
+    """Acrescenta um lote de movimentos (produto_id, tipo, quantidade, referencia) ao livro.
+
+    Deve rodar na mesma transação que alterou produtos.estoque. Produtos que
+    acumularam SNAPSHOT_A_CADA movimentos desde o último snapshot ganham um
+    novo, o que limita a varredura feita por estoque_em.
+    """
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cursor.executemany(
+        "INSERT INTO movimentos_estoque (produto_id, tipo, quantidade, data_hora, referencia) VALUES (?, ?, ?, ?, ?)",
+        [(produto_id, tipo, quantidade, agora, referencia) for produto_id, tipo, quantidade, referencia in movimentos]
+    )
+    for produto_id in {m[0] for m in movimentos}:
+        cursor.execute("SELECT COALESCE(MAX(ultimo_movimento_id), 0) FROM snapshots_estoque WHERE produto_id=?",
+                       (produto_id,))
+        ultimo_movimento_id = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*), MAX(id) FROM movimentos_estoque WHERE produto_id=? AND id > ?",
+                       (produto_id, ultimo_movimento_id))
+        pendentes, maior_id = cursor.fetchone()
+        if pendentes >= SNAPSHOT_A_CADA:
+            cursor.execute(
+                "INSERT INTO snapshots_estoque (produto_id, data_hora, estoque, ultimo_movimento_id) "
+                "SELECT id, ?, estoque, ? FROM produtos WHERE id=?",
+                (agora, maior_id, produto_id)
+            )
+
+def registrar_movimentos(movimentos):
+    """Aplica entradas, ajustes ou quebras ao estoque e registra tudo no livro em um só lote."""
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    cursor = conn.cursor()
+    try:
+        # Só entra no livro o movimento cujo produto ainda existe
+        aplicados = []
+        for movimento in movimentos:
+            produto_id, _, quantidade, _ = movimento
+            cursor.execute(
+                "UPDATE produtos SET estoque = estoque + ?, versao = versao + 1 WHERE id=?",
+                (quantidade, produto_id)
+            )
+            if cursor.rowcount:
+                aplicados.append(movimento)
+        if aplicados:
+            gravar_movimentos(cursor, aplicados)
+        conn.commit()
+        return aplicados
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def estoque_em(produto_id, momento):
+    """Estoque do produto no instante `momento` (datetime ou "AAAA-MM-DD HH:MM:SS").
+
+    Parte do snapshot mais recente até `momento` e soma só os movimentos
+    entre ele e o snapshot seguinte, em vez de refazer o histórico inteiro.
+    """
+    momento = formatar_data_hora(momento)
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT estoque, ultimo_movimento_id FROM snapshots_estoque "
+        "WHERE produto_id=? AND data_hora <= ? ORDER BY data_hora DESC, id DESC LIMIT 1",
+        (produto_id, momento)
+    )
+    snapshot = cursor.fetchone()
+    estoque, ultimo_movimento_id = snapshot if snapshot else (0, 0)
+    # O snapshot seguinte limita a varredura por id a no máximo SNAPSHOT_A_CADA movimentos
+    cursor.execute(
+        "SELECT ultimo_movimento_id FROM snapshots_estoque "
+        "WHERE produto_id=? AND data_hora > ? ORDER BY data_hora ASC, id ASC LIMIT 1",
+        (produto_id, momento)
+    )
+    proximo = cursor.fetchone()
+    ate_movimento_id = proximo[0] if proximo else 2 ** 63 - 1
+    cursor.execute(
+        "SELECT COALESCE(SUM(quantidade), 0) FROM movimentos_estoque "
+        "WHERE produto_id=? AND id > ? AND id <= ? AND data_hora <= ?",
+        (produto_id, ultimo_movimento_id, ate_movimento_id, momento)
+    )
+    estoque += cursor.fetchone()[0]
+    conn.close()
+    return estoque
+
+def compactar_movimentos(dias=RETENCAO_MOVIMENTOS_DIAS):
+    """Troca os movimentos com mais de `dias` dias por um snapshot por produto na data de corte."""
+    corte = (datetime.now() - timedelta(days=dias)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(
+            "SELECT produto_id, MAX(id) FROM movimentos_estoque WHERE data_hora < ? GROUP BY produto_id",
+            (corte,)
+        )
+        antigos = cursor.fetchall()
+        for produto_id, maior_id in antigos:
+            cursor.execute(
+                "SELECT estoque, ultimo_movimento_id FROM snapshots_estoque "
+                "WHERE produto_id=? AND ultimo_movimento_id <= ? ORDER BY ultimo_movimento_id DESC, id DESC LIMIT 1",
+                (produto_id, maior_id)
+            )
+            snapshot = cursor.fetchone()
+            estoque, ultimo_movimento_id = snapshot if snapshot else (0, 0)
+            cursor.execute(
+                "SELECT COALESCE(SUM(quantidade), 0) FROM movimentos_estoque WHERE produto_id=? AND id > ? AND id <= ?",
+                (produto_id, ultimo_movimento_id, maior_id)
+            )
+            estoque += cursor.fetchone()[0]
+            cursor.execute(
+                "INSERT INTO snapshots_estoque (produto_id, data_hora, estoque, ultimo_movimento_id) VALUES (?, ?, ?, ?)",
+                (produto_id, corte, estoque, maior_id)
+            )
+            cursor.execute("DELETE FROM snapshots_estoque WHERE produto_id=? AND data_hora < ?", (produto_id, corte))
+            cursor.execute("DELETE FROM movimentos_estoque WHERE produto_id=? AND id <= ?", (produto_id, maior_id))
+        conn.commit()
+        return len(antigos)
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def ler_estoque_reservado(cursor, produto_id, caixa, agora):
+    """Retorna (estoque, versao, reservado por outros caixas, reservado por este caixa)."""
+    cursor.execute("SELECT estoque, versao FROM produtos WHERE id=?", (produto_id,))
+    produto = cursor.fetchone()
+    if produto is None:
+        return None
+    cursor.execute(
+        "SELECT COALESCE(SUM(CASE WHEN caixa <> ? THEN quantidade END), 0),"
+        "       COALESCE(SUM(CASE WHEN caixa = ? THEN quantidade END), 0) "
+        "FROM reservas WHERE produto_id=? AND expira_em > ?",
+        (caixa, caixa, produto_id, agora)
+    )
+    reservado_outros, reservado_meu = cursor.fetchone()
+    return produto[0], produto[1], reservado_outros, reservado_meu
+
+def reservar_estoque(produto_id, quantidade, caixa=CAIXA_ID):
+    """Ajusta a reserva do caixa para `quantidade` unidades (o total no carrinho).
+
+    A leitura é feita fora de transação e a gravação só acontece se `versao`
+    não mudou nesse meio tempo (compare-and-swap); em conflito, tenta de novo.
+    Retorna (reservado, disponivel), onde disponivel é o estoque menos as
+    reservas ativas dos outros caixas.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    cursor = conn.cursor()
+    try:
+        for _ in range(TENTATIVAS_CAS):
+            agora = time.time()
+            leitura = ler_estoque_reservado(cursor, produto_id, caixa, agora)
+            if leitura is None:
+                return False, 0
+            estoque, versao, reservado_outros, reservado_meu = leitura
+            disponivel = estoque - reservado_outros
+
+            # Diminuir a própria reserva é sempre permitido
+            if quantidade > reservado_meu and quantidade > disponivel:
+                return False, disponivel
+
+            cursor.execute(
+                "UPDATE produtos SET versao = versao + 1 WHERE id=? AND versao=?",
+                (produto_id, versao)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                continue
+
+            if quantidade > 0:
+                cursor.execute(
+                    "INSERT INTO reservas (produto_id, caixa, quantidade, expira_em) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (produto_id, caixa) DO UPDATE SET quantidade=excluded.quantidade, expira_em=excluded.expira_em",
+                    (produto_id, caixa, quantidade, agora + RESERVA_TTL)
+                )
+            else:
+                cursor.execute("DELETE FROM reservas WHERE produto_id=? AND caixa=?", (produto_id, caixa))
+            # Qualquer movimento no carrinho renova as demais reservas do caixa
+            cursor.execute("UPDATE reservas SET expira_em=? WHERE caixa=?", (agora + RESERVA_TTL, caixa))
+            conn.commit()
+            return True, disponivel
+        raise sqlite3.OperationalError("Estoque alterado por outro caixa repetidas vezes. Tente novamente.")
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def liberar_reservas(caixa=CAIXA_ID):
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT produto_id FROM reservas WHERE caixa=?", (caixa,))
+    produtos = [(p[0],) for p in cursor.fetchall()]
+    cursor.executemany("UPDATE produtos SET versao = versao + 1 WHERE id=?", produtos)
+    cursor.execute("DELETE FROM reservas WHERE caixa=?", (caixa,))
+    conn.commit()
+    conn.close()
+
+def registrar_venda(carrinho, caixa=CAIXA_ID):
+    """Converte as reservas do caixa em venda, baixando o estoque com compare-and-swap.
+
+    Levanta ValueError se algum item não tiver mais estoque disponível.
+    Retorna o id da venda gravada.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    cursor = conn.cursor()
+    try:
+        for _ in range(TENTATIVAS_CAS):
+            agora = time.time()
+            versoes = {}
+            for prod_id, item in carrinho.items():
+                leitura = ler_estoque_reservado(cursor, prod_id, caixa, agora)
+                if leitura is None:
+                    raise ValueError(f"Produto com ID {prod_id} não encontrado no banco de dados.")
+                estoque, versao, reservado_outros, _ = leitura
+                disponivel = estoque - reservado_outros
+                if disponivel < item["quantidade"]:
+                    raise ValueError(f"Estoque insuficiente para '{item['nome']}'. Disponível: {disponivel}.")
+                versoes[prod_id] = versao
+
+            conflito = False
+            for prod_id, item in carrinho.items():
+                cursor.execute(
+                    "UPDATE produtos SET estoque = estoque - ?, versao = versao + 1 WHERE id=? AND versao=?",
+                    (item["quantidade"], prod_id, versoes[prod_id])
+                )
+                if cursor.rowcount == 0:
+                    conflito = True
+                    break
+            if conflito:
+                conn.rollback()
+                continue
+
+            total = sum(item["preco"] * item["quantidade"] for item in carrinho.values())
+            cursor.execute("INSERT INTO vendas (data_hora, total) VALUES (?, ?)",
+                           (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), total))
+            venda_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO itens_venda (venda_id, produto_id, quantidade, subtotal) VALUES (?, ?, ?, ?)",
+                [(venda_id, prod_id, item["quantidade"], item["preco"] * item["quantidade"])
+                 for prod_id, item in carrinho.items()]
+            )
+            gravar_movimentos(cursor, [(prod_id, "venda", -item["quantidade"], f"venda {venda_id}")
+                                       for prod_id, item in carrinho.items()])
+            cursor.execute("DELETE FROM reservas WHERE caixa=? OR expira_em <= ?", (caixa, agora))
+            conn.commit()
+            return venda_id
+        raise sqlite3.OperationalError("Estoque alterado por outro caixa repetidas vezes. Tente novamente.")
+    except (ValueError, sqlite3.Error):
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def caminho_particao(mes_ref):
+    """Arquivo da partição mensal de vendas; `mes_ref` no formato "AAAA-MM"."""
+    return os.path.join(PASTA_ARQUIVO, f"vendas_{mes_ref.replace('-', '_')}.db")
+
+def mes_seguinte(ano, mes):
+    return (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+def arquivar_vendas(meses_quentes=MESES_VENDAS_QUENTES):
+    """Move as vendas de meses já fechados para um arquivo SQLite por mês.
+
+    O mês atual e os `meses_quentes - 1` anteriores ficam no banco principal.
+    Com o banco em WAL, uma transação entre arquivos anexados não é atômica
+    como um todo, então cada mês é copiado e confirmado na partição primeiro
+    e só depois apagado do banco principal, e apenas o que já está na
+    partição. Repetir um arquivamento interrompido é seguro.
+    """
+    hoje = datetime.now()
+    ano, mes = hoje.year, hoje.month
+    for _ in range(meses_quentes - 1):
+        ano, mes = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    corte = f"{ano:04d}-{mes:02d}-01 00:00:00"
+
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT substr(data_hora, 1, 7) FROM vendas WHERE data_hora < ?", (corte,))
+    meses = [m[0] for m in cursor.fetchall()]
+    if meses:
+        os.makedirs(PASTA_ARQUIVO, exist_ok=True)
+
+    try:
+        for mes_ref in meses:
+            ano_fim, mes_fim = mes_seguinte(int(mes_ref[:4]), int(mes_ref[5:7]))
+            intervalo = (f"{mes_ref}-01 00:00:00", f"{ano_fim:04d}-{mes_fim:02d}-01 00:00:00")
+            vendas_do_mes = "SELECT id FROM main.vendas WHERE data_hora >= ? AND data_hora < ?"
+
+            cursor.execute("ATTACH DATABASE ? AS arquivo", (caminho_particao(mes_ref),))
+            try:
+                criar_tabelas_venda(cursor, "arquivo")
+                cursor.execute(
+                    "INSERT OR IGNORE INTO arquivo.vendas (id, data_hora, total) "
+                    "SELECT id, data_hora, total FROM main.vendas WHERE data_hora >= ? AND data_hora < ?",
+                    intervalo
+                )
+                cursor.execute(
+                    "INSERT OR IGNORE INTO arquivo.itens_venda (id, venda_id, produto_id, quantidade, subtotal) "
+                    f"SELECT id, venda_id, produto_id, quantidade, subtotal FROM main.itens_venda WHERE venda_id IN ({vendas_do_mes})",
+                    intervalo
+                )
+                conn.commit()
+
+                cursor.execute("DELETE FROM main.itens_venda WHERE id IN (SELECT id FROM arquivo.itens_venda)")
+                cursor.execute("DELETE FROM main.vendas WHERE id IN (SELECT id FROM arquivo.vendas)")
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            finally:
+                cursor.execute("DETACH DATABASE arquivo")
+
+        if meses:
+            # Devolve ao sistema as páginas liberadas para o banco principal continuar pequeno
+            try:
+                cursor.execute("VACUUM")
+            except sqlite3.Error as e:
+                print(f"Erro ao compactar o banco após arquivar vendas: {e}")
+    finally:
+        conn.close()
+    return meses
+
+def particoes_no_intervalo(inicio, fim):
+    ano, mes = int(inicio[:4]), int(inicio[5:7])
+    ultimo_mes = fim[:7]
+    # O intervalo é semiaberto: fim à meia-noite do dia 1 não inclui aquele mês
+    if fim[7:] in ("-01", "-01 00:00:00"):
+        ano_fim, mes_fim = int(fim[:4]), int(fim[5:7])
+        ano_fim, mes_fim = (ano_fim - 1, 12) if mes_fim == 1 else (ano_fim, mes_fim - 1)
+        ultimo_mes = f"{ano_fim:04d}-{mes_fim:02d}"
+    caminhos = []
+    while f"{ano:04d}-{mes:02d}" <= ultimo_mes:
+        caminho = caminho_particao(f"{ano:04d}-{mes:02d}")
+        if os.path.exists(caminho):
+            caminhos.append(caminho)
+        ano, mes = mes_seguinte(ano, mes)
+    return caminhos
+
+def consultar_particionado(sql, inicio, fim):
+    """Executa `sql` no banco principal e nas partições mensais que cobrem [inicio, fim).
+
+    `sql` deve usar {vendas} e {itens_venda} como nomes de tabela e dois
+    parâmetros (inicio, fim). Só os arquivos do intervalo são anexados, no
+    máximo MAX_PARTICOES_ANEXADAS por vez. Retorna as linhas de todos os bancos.
+    """
+    inicio, fim = formatar_data_hora(inicio), formatar_data_hora(fim)
+    particoes = particoes_no_intervalo(inicio, fim)
+    lotes = [particoes[i:i + MAX_PARTICOES_ANEXADAS]
+             for i in range(0, len(particoes), MAX_PARTICOES_ANEXADAS)] or [[]]
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    resultados = []
+    try:
+        for n, lote in enumerate(lotes):
+            esquemas = ["main"] if n == 0 else []
+            for i, caminho in enumerate(lote):
+                cursor.execute(f"ATTACH DATABASE ? AS particao{i}", (caminho,))
+                esquemas.append(f"particao{i}")
+            try:
+                consulta = " UNION ALL ".join(
+                    sql.format(vendas=f"{e}.vendas", itens_venda=f"{e}.itens_venda") for e in esquemas
+                )
+                cursor.execute(consulta, (inicio, fim) * len(esquemas))
+                resultados.extend(cursor.fetchall())
+            finally:
+                for i in range(len(lote)):
+                    cursor.execute(f"DETACH DATABASE particao{i}")
+    finally:
+        conn.close()
+    return resultados
+
+def consultar_vendas(inicio, fim):
+    """Vendas (id, data_hora, total) no intervalo [inicio, fim), em ordem cronológica."""
+    vendas = consultar_particionado(
+        "SELECT id, data_hora, total FROM {vendas} WHERE data_hora >= ? AND data_hora < ?",
+        inicio, fim
+    )
+    vendas.sort(key=lambda v: (v[1], v[0]))
+    return vendas
+
+def vendas_por_produto(inicio, fim):
+    """Retorna {produto_id: (quantidade, subtotal)} vendidos no intervalo [inicio, fim)."""
+    parciais = consultar_particionado(
+        "SELECT i.produto_id, SUM(i.quantidade), SUM(i.subtotal) "
+        "FROM {itens_venda} i JOIN {vendas} v ON v.id = i.venda_id "
+        "WHERE v.data_hora >= ? AND v.data_hora < ? GROUP BY i.produto_id",
+        inicio, fim
+    )
+    totais = {}
+    for produto_id, quantidade, subtotal in parciais:
+        qtd_atual, subtotal_atual = totais.get(produto_id, (0, 0.0))
+        totais[produto_id] = (qtd_atual + quantidade, subtotal_atual + subtotal)
+    return totais
@@ -0,0 +1,74 @@
+"""Benchmark do arquivamento mensal de vendas com um histórico sintético.
+
+Uso: python bench_arquivo.py [quantidade_de_vendas] [meses_de_historico]
+Padrão: 2.000.000 de vendas (uma linha em itens_venda por venda) em 24 meses.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import banco
+
+
+def gerar_historico(quantidade, meses):
+    inicio = datetime.now() - timedelta(days=30 * meses)
+    passo = timedelta(days=30 * meses) / quantidade
+
+    conn = sqlite3.connect(banco.DB_PATH)
+    conn.executemany(
+        "INSERT INTO vendas (id, data_hora, total) VALUES (?, ?, ?)",
+        ((i, (inicio + passo * i).strftime("%Y-%m-%d %H:%M:%S"), 10.0) for i in range(1, quantidade + 1))
+    )
+    conn.executemany(
+        "INSERT INTO itens_venda (venda_id, produto_id, quantidade, subtotal) VALUES (?, ?, ?, ?)",
+        ((i, i % 500 + 1, 1, 10.0) for i in range(1, quantidade + 1))
+    )
+    conn.commit()
+    conn.close()
+    return inicio
+
+
+def medir(descricao, funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    print(f"{descricao:<45} {(time.perf_counter() - inicio) * 1000:>10.1f} ms")
+    return resultado
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    meses = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+
+    with tempfile.TemporaryDirectory() as pasta:
+        banco.DB_PATH = os.path.join(pasta, "banco.db")
+        banco.PASTA_ARQUIVO = os.path.join(pasta, "arquivo_vendas")
+        banco.criar_tabela()
+
+        inicio = medir(f"Gerar {quantidade} vendas em {meses} meses", gerar_historico, quantidade, meses)
+        print(f"Banco principal antes: {os.path.getsize(banco.DB_PATH) / 1e6:.1f} MB")
+
+        agora = datetime.now()
+        dois_meses = (agora - timedelta(days=400), agora - timedelta(days=340))
+        ultimos_dias = (agora - timedelta(days=3), agora + timedelta(days=1))
+        historico = (inicio, agora + timedelta(days=1))
+
+        antes = medir("consultar_vendas 2 meses (sem arquivo)", banco.consultar_vendas, *dois_meses)
+        medir("consultar_vendas 3 dias (sem arquivo)", banco.consultar_vendas, *ultimos_dias)
+
+        arquivados = medir("arquivar_vendas (inclui VACUUM)", banco.arquivar_vendas)
+        print(f"Meses arquivados: {len(arquivados)}; "
+              f"banco principal depois: {os.path.getsize(banco.DB_PATH) / 1e6:.1f} MB")
+
+        depois = medir("consultar_vendas 2 meses (particionado)", banco.consultar_vendas, *dois_meses)
+        medir("consultar_vendas 3 dias (particionado)", banco.consultar_vendas, *ultimos_dias)
+        totais = medir("vendas_por_produto histórico inteiro", banco.vendas_por_produto, *historico)
+
+        assert len(antes) == len(depois)
+        assert sum(quantidade_vendida for quantidade_vendida, _ in totais.values()) == quantidade
+
+
+if __name__ == "__main__":
+    main()
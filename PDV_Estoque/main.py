@@ -8,11 +8,16 @@ import time
 import win32print
 from datetime import datetime
 import re
+import sys
+from banco import (DB_PATH, CAIXA_ID, criar_tabela, compactar_movimentos, arquivar_vendas,
+                   obter_produto_por_id, gravar_movimentos, reservar_estoque,
+                   liberar_reservas, registrar_venda)
+from modelo_produtos import ModeloProdutos, VisaoProdutos
 
-DB_PATH = 'banco.db'
 PRINTER_NAME = 'HPRT MPT-II'
 SERIAL_PORT = 'COM3'
 BAUDRATE = 115200
+LIMITE_REDESENHO_MS = 50
 peso_atual = None
 
 ctk.set_appearance_mode("light")
@@ -26,38 +31,6 @@ COR_VERMELHO_ALERTA = "#D32F2F"
 COR_VERDE_SUCESSO = "#388E3C"
 COR_AMARELO_AVISO = "#FFA000"
 
-def criar_tabela():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS produtos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            preco REAL NOT NULL,
-            estoque INTEGER NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-def obter_produto_por_id(produto_id):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, nome, preco, estoque FROM produtos WHERE id=?", (produto_id,))
-    produto = cursor.fetchone()
-    conn.close()
-    return produto
-
-def atualizar_estoque_db(produto_id, quantidade_vendida):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE produtos SET estoque = estoque - ? WHERE id=?",
-        (quantidade_vendida, produto_id)
-    )
-    conn.commit()
-    conn.close()
-
 def imprimir_cupom_escpos_raw(venda_itens):
     ESC = b'\x1b'
     GS = b'\x1d'
@@ -115,6 +88,15 @@ def imprimir_cupom_escpos_raw(venda_itens):
         print(f"Erro ao imprimir: {e}")
         messagebox.showerror("Erro de Impressão", f"Não foi possível imprimir o cupom.\nVerifique a impressora '{PRINTER_NAME}'.\nErro: {e}")
 
+def manutencao_banco():
+    # Roda fora da thread da interface: o primeiro arquivamento pode levar segundos
+    # e outro caixa pode estar segurando a trava de escrita
+    for tarefa in (compactar_movimentos, arquivar_vendas):
+        try:
+            tarefa()
+        except sqlite3.Error as e:
+            print(f"Erro na manutenção do banco ({tarefa.__name__}): {e}")
+
 def ler_peso_esp32():
     global peso_atual
     try:
@@ -142,13 +124,109 @@ def ler_peso_esp32():
     except Exception as e:
         print(f"Erro desconhecido na leitura serial: {e}")
 
-threading.Thread(target=ler_peso_esp32, daemon=True).start()
+class AgendadorTela:
+    """Centraliza redesenhos e timers da interface.
+
+    Atualizações marcadas com `marcar` são agrupadas e executadas uma única
+    vez no próximo idle do Tk. Timers só rodam enquanto o frame dono está
+    visível. O custo de cada atualização e das passadas lentas fica
+    registrado e é exibido por `relatorio`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.pendentes = {}
+        self.timers = []
+        self.frame_visivel = None
+        self.custos = {}
+        self.passadas = 0
+        self.passadas_lentas = 0
+        self.pior_passada = (0.0, "")
+        self._idle_id = None
+        self._tick_id = None
+
+    def marcar(self, funcao):
+        self.pendentes[funcao] = True
+        if self._idle_id is None:
+            self._idle_id = self.root.after_idle(self.renderizar)
+
+    def renderizar(self):
+        self._idle_id = None
+        pendentes, self.pendentes = self.pendentes, {}
+        inicio = time.perf_counter()
+        for funcao in pendentes:
+            self.executar(funcao)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        self.passadas += 1
+        if duracao_ms > LIMITE_REDESENHO_MS:
+            self.passadas_lentas += 1
+        if duracao_ms > self.pior_passada[0]:
+            self.pior_passada = (duracao_ms, ", ".join(f.__qualname__ for f in pendentes))
+
+    def executar(self, funcao):
+        inicio = time.perf_counter()
+        try:
+            funcao()
+        except Exception:
+            # Mesmo tratamento (com traceback) que o Tk daria, sem perder as demais atualizações
+            self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            chamadas, total_ms, max_ms = self.custos.get(funcao.__qualname__, (0, 0.0, 0.0))
+            self.custos[funcao.__qualname__] = (chamadas + 1, total_ms + duracao_ms, max(max_ms, duracao_ms))
+
+    def registrar_timer(self, frame, intervalo_ms, funcao):
+        self.timers.append([frame, intervalo_ms, funcao, 0.0])
+
+    def mostrar(self, frame):
+        """Informa qual frame está na tela; timers dos demais ficam suspensos."""
+        self.frame_visivel = frame
+        for timer in self.timers:
+            if timer[0] is frame:
+                timer[3] = 0.0
+        if self._tick_id is not None:
+            self.root.after_cancel(self._tick_id)
+            self._tick_id = None
+        self.tick()
+
+    def tick(self):
+        self._tick_id = None
+        agora = time.monotonic()
+        proximo = None
+        for timer in self.timers:
+            frame, intervalo_ms, funcao, vencimento = timer
+            if frame is not self.frame_visivel:
+                continue
+            if agora >= vencimento:
+                self.executar(funcao)
+                timer[3] = agora + intervalo_ms / 1000
+            espera = timer[3] - agora
+            proximo = espera if proximo is None else min(proximo, espera)
+        if proximo is not None:
+            self._tick_id = self.root.after(max(int(proximo * 1000), 10), self.tick)
+
+    def relatorio(self):
+        linhas = [f"{'Atualização':<45} {'Chamadas':>8} {'Média ms':>9} {'Máx ms':>8}"]
+        for nome, (chamadas, total_ms, max_ms) in sorted(self.custos.items(), key=lambda c: -c[1][1]):
+            linhas.append(f"{nome:<45} {chamadas:>8} {total_ms / chamadas:>9.2f} {max_ms:>8.2f}")
+        linhas.append(f"Passadas: {self.passadas}, acima de {LIMITE_REDESENHO_MS} ms: {self.passadas_lentas}")
+        if self.passadas:
+            linhas.append(f"Pior passada: {self.pior_passada[0]:.1f} ms ({self.pior_passada[1]})")
+        return "\n".join(linhas)
 
 class CadastroFrame(ctk.CTkFrame):
+    ROTULOS_ORDENACAO = {"Nome": "nome", "Preço": "preco", "Estoque": "estoque"}
+
     def __init__(self, master, voltar_callback):
         super().__init__(master, fg_color=COR_FUNDO_PRINCIPAL)
         self.voltar_callback = voltar_callback
+        self.agendador = master.agendador
         self.produto_selecionado = None
+        self.estoque_selecionado = None
+
+        self.modelo = ModeloProdutos()
+        self.visao = VisaoProdutos(self.modelo)
+        self._filtro_after_id = None
 
         ctk.CTkLabel(self, text="Cadastro de Produtos",
                      font=ctk.CTkFont("Segoe UI", 32, "bold"),
@@ -199,6 +277,32 @@ class CadastroFrame(ctk.CTkFrame):
                      font=ctk.CTkFont("Segoe UI", 22, "bold"),
                      text_color=COR_AZUL_ESCURO).pack(pady=15)
 
+        frame_visao = ctk.CTkFrame(self, fg_color=COR_FUNDO_PRINCIPAL)
+        frame_visao.pack(pady=(0, 5), padx=30, fill="x")
+
+        ctk.CTkLabel(frame_visao, text="Filtrar:", text_color="black",
+                     font=ctk.CTkFont("Segoe UI", 14))\
+            .pack(side="left", padx=(0, 10))
+        self.filtro_entry = ctk.CTkEntry(frame_visao, font=ctk.CTkFont("Segoe UI", 14),
+                                         width=300, height=34, placeholder_text="Nome do produto")
+        self.filtro_entry.pack(side="left")
+        self.filtro_entry.bind("<KeyRelease>", self.agendar_filtro)
+
+        self.ordem_botao = ctk.CTkButton(frame_visao, text="Crescente", command=self.inverter_ordem,
+                                         fg_color=COR_AZUL_PRIMARIO, text_color="white",
+                                         hover_color=COR_AZUL_ESCURO,
+                                         font=ctk.CTkFont("Segoe UI", 14), width=120, height=34)
+        self.ordem_botao.pack(side="right")
+        self.ordem_menu = ctk.CTkOptionMenu(frame_visao, values=list(self.ROTULOS_ORDENACAO),
+                                            command=self.ordenar_por,
+                                            fg_color=COR_AZUL_PRIMARIO, button_color=COR_AZUL_PRIMARIO,
+                                            button_hover_color=COR_AZUL_ESCURO,
+                                            font=ctk.CTkFont("Segoe UI", 14), width=140, height=34)
+        self.ordem_menu.pack(side="right", padx=10)
+        ctk.CTkLabel(frame_visao, text="Ordenar por:", text_color="black",
+                     font=ctk.CTkFont("Segoe UI", 14))\
+            .pack(side="right")
+
         listbox_wrapper_frame = ctk.CTkFrame(self, fg_color=COR_FUNDO_SECUNDARIO, corner_radius=10, border_color=COR_AZUL_PRIMARIO, border_width=2)
         listbox_wrapper_frame.pack(pady=10, padx=30, fill="both", expand=True)
 
@@ -221,8 +325,7 @@ class CadastroFrame(ctk.CTkFrame):
                                                  text_color=COR_VERMELHO_ALERTA)
         self.label_estoque_baixo.pack(pady=10)
 
-        self.listar_produtos()
-        self.atualizar_aviso_estoque()
+        self.agendador.registrar_timer(self, 1000, self.atualizar_aviso_estoque)
 
     def validar_entradas_numericas(self, preco_str, estoque_str):
         try:
@@ -261,52 +364,91 @@ class CadastroFrame(ctk.CTkFrame):
         try:
             cursor.execute("INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)",
                            (nome, preco, estoque))
+            prod_id = cursor.lastrowid
+            if estoque:
+                gravar_movimentos(cursor, [(prod_id, "entrada", estoque, "cadastro")])
             conn.commit()
+            novo = (prod_id, nome, preco, estoque)
+            self.modelo.inserir(novo)
             messagebox.showinfo("Sucesso", f"Produto '{nome}' cadastrado com sucesso!")
             self.limpar_campos()
-            self.listar_produtos()
+            self.atualizar_linha(None, novo)
         except sqlite3.Error as e:
             messagebox.showerror("Erro no Banco de Dados", f"Não foi possível cadastrar o produto: {e}")
         finally:
             conn.close()
 
     def listar_produtos(self):
-        self.tk_listbox.delete(0, tk.END)
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, nome, preco, estoque FROM produtos ORDER BY nome ASC")
-        produtos = cursor.fetchall()
-        conn.close()
+        self.modelo.carregar()
+        self.aplicar_visao()
 
-        for p in produtos:
-            self.tk_listbox.insert(
-                tk.END,
-                f"ID:{p[0]:<4} | {p[1]:<30} | R$ {p[2]:<10.2f} | Estoque: {p[3]:<5}"
-            )
+    def formatar_linha(self, p):
+        return f"ID:{p[0]:<4} | {p[1]:<30} | R$ {p[2]:<10.2f} | Estoque: {p[3]:<5}"
+
+    def aplicar_visao(self):
+        if self._filtro_after_id is not None:
+            self.after_cancel(self._filtro_after_id)
+            self._filtro_after_id = None
+
+        ids = self.visao.aplicar(self.filtro_entry.get().strip().lower())
+
+        self.tk_listbox.delete(0, tk.END)
+        if ids:
+            self.tk_listbox.insert(tk.END, *(self.formatar_linha(self.modelo.obter(i)) for i in ids))
+
+    def agendar_filtro(self, event=None):
+        # Espera o usuário parar de digitar antes de refiltrar a lista inteira
+        if self._filtro_after_id is not None:
+            self.after_cancel(self._filtro_after_id)
+        self._filtro_after_id = self.after(250, self.aplicar_visao)
+
+    def ordenar_por(self, rotulo):
+        self.visao.campo_ordem = self.ROTULOS_ORDENACAO[rotulo]
+        self.aplicar_visao()
+
+    def inverter_ordem(self):
+        self.visao.ordem_decrescente = not self.visao.ordem_decrescente
+        self.ordem_botao.configure(text="Decrescente" if self.visao.ordem_decrescente else "Crescente")
+        self.aplicar_visao()
+
+    def atualizar_linha(self, antigo, novo):
+        """Reflete uma inserção, edição ou exclusão só na linha afetada da lista."""
+        if antigo is not None:
+            indice = self.visao.remover(antigo)
+            if indice is not None:
+                self.tk_listbox.delete(indice)
+
+        if novo is not None:
+            indice = self.visao.inserir(novo)
+            if indice is not None:
+                self.tk_listbox.insert(indice, self.formatar_linha(novo))
+                self.tk_listbox.see(indice)
+                return indice
+        return None
 
     def selecionar_produto(self, event):
         selection = self.tk_listbox.curselection()
         if not selection:
             return
 
-        linha_selecionada = self.tk_listbox.get(selection[0])
-        match = re.match(r"ID:(\d+)", linha_selecionada)
-        if not match:
-            messagebox.showerror("Erro de Seleção", "Formato de item da lista inválido. Por favor, selecione um item válido.")
-            self.produto_selecionado = None
-            return
-
-        prod_id = int(match.group(1))
+        prod_id = self.visao.id_na_linha(selection[0])
+        # O id vem do modelo, mas a linha é relida: outros caixas vendem com esta tela aberta
         produto = obter_produto_por_id(prod_id)
 
         if produto:
+            if produto != self.modelo.obter(prod_id):
+                indice = self.atualizar_linha(self.modelo.atualizar(produto), produto)
+                if indice is not None:
+                    self.tk_listbox.selection_set(indice)
             self.limpar_campos()
             self.nome_entry.insert(0, produto[1])
             self.preco_entry.insert(0, str(produto[2]))
             self.estoque_entry.insert(0, str(produto[3]))
             self.produto_selecionado = produto[0]
+            self.estoque_selecionado = produto[3]
         else:
             messagebox.showwarning("Produto Não Encontrado", "O produto selecionado não foi encontrado no banco de dados.")
+            self.atualizar_linha(self.modelo.remover(prod_id), None)
             self.limpar_campos()
 
     def editar_produto(self):
@@ -329,14 +471,37 @@ class CadastroFrame(ctk.CTkFrame):
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         try:
+            # Trava a escrita antes de ler o estoque atual, que pode ter mudado desde a seleção
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT estoque FROM produtos WHERE id=?", (self.produto_selecionado,))
+            produto = cursor.fetchone()
+            if produto is None:
+                conn.rollback()
+                messagebox.showwarning("Produto Não Encontrado", "O produto selecionado não foi encontrado no banco de dados.")
+                self.atualizar_linha(self.modelo.remover(self.produto_selecionado), None)
+                self.limpar_campos()
+                return
+            # Aplica só a mudança que o operador fez no campo, preservando as vendas
+            # que outros caixas fizeram depois que o produto foi selecionado
+            ajuste = estoque - self.estoque_selecionado
+            estoque_novo = produto[0] + ajuste
+            if estoque_novo < 0:
+                conn.rollback()
+                messagebox.showwarning("Valor Inválido",
+                                       f"O ajuste deixaria o estoque negativo. Estoque atual: {produto[0]} unidade(s).")
+                return
             cursor.execute(
-                "UPDATE produtos SET nome=?, preco=?, estoque=? WHERE id=?",
-                (nome, preco, estoque, self.produto_selecionado)
+                "UPDATE produtos SET nome=?, preco=?, estoque=?, versao = versao + 1 WHERE id=?",
+                (nome, preco, estoque_novo, self.produto_selecionado)
             )
+            if ajuste:
+                gravar_movimentos(cursor, [(self.produto_selecionado, "ajuste", ajuste, "edição manual")])
             conn.commit()
+            novo = (self.produto_selecionado, nome, preco, estoque_novo)
+            antigo = self.modelo.atualizar(novo)
             messagebox.showinfo("Sucesso", f"Produto '{nome}' atualizado com sucesso!")
             self.limpar_campos()
-            self.listar_produtos()
+            self.atualizar_linha(antigo, novo)
         except sqlite3.Error as e:
             messagebox.showerror("Erro no Banco de Dados", f"Não foi possível atualizar o produto: {e}")
         finally:
@@ -356,11 +521,25 @@ class CadastroFrame(ctk.CTkFrame):
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT estoque FROM produtos WHERE id=?", (self.produto_selecionado,))
+            produto = cursor.fetchone()
+            if produto is None:
+                conn.rollback()
+                messagebox.showwarning("Produto Não Encontrado", "O produto selecionado não foi encontrado no banco de dados.")
+                self.atualizar_linha(self.modelo.remover(self.produto_selecionado), None)
+                self.limpar_campos()
+                return
+            estoque_antigo = produto[0]
+            cursor.execute("DELETE FROM reservas WHERE produto_id=?", (self.produto_selecionado,))
             cursor.execute("DELETE FROM produtos WHERE id=?", (self.produto_selecionado,))
+            if estoque_antigo:
+                gravar_movimentos(cursor, [(self.produto_selecionado, "ajuste", -estoque_antigo, "exclusão")])
             conn.commit()
+            antigo = self.modelo.remover(self.produto_selecionado)
             messagebox.showinfo("Sucesso", "Produto excluído com sucesso!")
             self.limpar_campos()
-            self.listar_produtos()
+            self.atualizar_linha(antigo, None)
         except sqlite3.Error as e:
             messagebox.showerror("Erro no Banco de Dados", f"Não foi possível excluir o produto: {e}")
         finally:
@@ -371,23 +550,26 @@ class CadastroFrame(ctk.CTkFrame):
         self.preco_entry.delete(0, tk.END)
         self.estoque_entry.delete(0, tk.END)
         self.produto_selecionado = None
+        self.estoque_selecionado = None
 
     def atualizar_aviso_estoque(self):
         global peso_atual
         if peso_atual is not None and peso_atual < 100:
             texto = f"⚠️ Atenção: Estoque físico na balança baixo! Peso detectado: {peso_atual:.2f} g"
-            self.label_estoque_baixo.configure(text=texto, text_color=COR_VERMELHO_ALERTA)
         else:
-            self.label_estoque_baixo.configure(text="", text_color=COR_VERMELHO_ALERTA)
-        self.after(1000, self.atualizar_aviso_estoque)
+            texto = ""
+        if texto != self.label_estoque_baixo.cget("text"):
+            self.label_estoque_baixo.configure(text=texto, text_color=COR_VERMELHO_ALERTA)
 
 class VendasFrame(ctk.CTkFrame):
     def __init__(self, master, voltar_callback):
         super().__init__(master, fg_color=COR_FUNDO_PRINCIPAL)
         self.voltar_callback = voltar_callback
+        self.agendador = master.agendador
 
         self.carrinho = {}
         self.produtos_cache = {}
+        self.item_em_foco = None
 
         ctk.CTkLabel(self, text="Tela de Vendas",
                      font=ctk.CTkFont("Segoe UI", 32, "bold"),
@@ -471,17 +653,24 @@ class VendasFrame(ctk.CTkFrame):
                       font=ctk.CTkFont("Segoe UI", 14), width=220, height=45)\
             .pack(pady=25)
 
-        self.carregar_produtos()
-        self.atualizar_peso_balanca_aviso()
-        self.atualizar_subtotal_label()
+        self.agendador.registrar_timer(self, 1000, self.atualizar_peso_balanca_aviso)
 
     def atualizar_peso_balanca_aviso(self):
         global peso_atual
         if peso_atual is not None and peso_atual < 100:
-            self.label_aviso_estoque_balanca.configure(text="⚠️ Atenção: Estoque físico com peso baixo! Últimas unidades!", text_color=COR_VERMELHO_ALERTA)
+            texto = "⚠️ Atenção: Estoque físico com peso baixo! Últimas unidades!"
         else:
-            self.label_aviso_estoque_balanca.configure(text="", text_color=COR_VERMELHO_ALERTA)
-        self.after(1000, self.atualizar_peso_balanca_aviso)
+            texto = ""
+        if texto != self.label_aviso_estoque_balanca.cget("text"):
+            self.label_aviso_estoque_balanca.configure(text=texto, text_color=COR_VERMELHO_ALERTA)
+
+    def marcar_carrinho_alterado(self, prod_id=None):
+        # Carrinho, subtotal e grade de produtos são redesenhados juntos no próximo idle
+        if prod_id is not None:
+            self.item_em_foco = prod_id
+        self.agendador.marcar(self.atualizar_carrinho_display)
+        self.agendador.marcar(self.atualizar_subtotal_label)
+        self.agendador.marcar(self.carregar_produtos)
 
     def carregar_produtos(self):
         for widget in self.scrollable_products_frame.winfo_children():
@@ -490,9 +679,17 @@ class VendasFrame(ctk.CTkFrame):
 
         self.produtos_cache.clear()
 
+        # Estoque exibido já desconta o que outros caixas têm reservado
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
-        cursor.execute("SELECT id, nome, preco, estoque FROM produtos ORDER BY nome ASC")
+        cursor.execute("""
+            SELECT p.id, p.nome, p.preco, p.estoque - COALESCE(SUM(r.quantidade), 0)
+            FROM produtos p
+            LEFT JOIN reservas r
+                ON r.produto_id = p.id AND r.caixa <> ? AND r.expira_em > ?
+            GROUP BY p.id
+            ORDER BY p.nome ASC
+        """, (CAIXA_ID, time.time()))
         resultados = cursor.fetchall()
         conn.close()
 
@@ -520,16 +717,22 @@ class VendasFrame(ctk.CTkFrame):
         produto_db = obter_produto_por_id(prod_id)
         if not produto_db:
             messagebox.showerror("Erro", "Produto não encontrado no banco de dados.")
-            self.carregar_produtos()
+            self.agendador.marcar(self.carregar_produtos)
             return
 
-        nome, preco, estoque_atual_db = produto_db[1], produto_db[2], produto_db[3]
+        nome, preco = produto_db[1], produto_db[2]
         
         qtd_no_carrinho = self.carrinho.get(prod_id, {}).get("quantidade", 0)
 
-        if estoque_atual_db <= qtd_no_carrinho:
+        try:
+            reservado, disponivel = reservar_estoque(prod_id, qtd_no_carrinho + 1)
+        except sqlite3.Error as e:
+            messagebox.showerror("Erro no Banco de Dados", f"Não foi possível reservar o produto: {e}")
+            return
+
+        if not reservado:
             messagebox.showwarning("Estoque Insuficiente",
-                                   f"Estoque insuficiente para '{nome}'.\nDisponível: {estoque_atual_db - qtd_no_carrinho} unidade(s).")
+                                   f"Estoque insuficiente para '{nome}'.\nDisponível: {max(disponivel - qtd_no_carrinho, 0)} unidade(s).")
             return
 
         if prod_id in self.carrinho:
@@ -541,18 +744,7 @@ class VendasFrame(ctk.CTkFrame):
                 "quantidade": 1
             }
 
-        self.atualizar_carrinho_display()
-        self.atualizar_subtotal_label()
-        self.carregar_produtos()
-        
-        # Seleciona o item no carrinho após adicionar
-        for i in range(self.listbox_carrinho.size()):
-            if f"ID:{prod_id:<4}" in self.listbox_carrinho.get(i):
-                self.listbox_carrinho.selection_clear(0, tk.END)
-                self.listbox_carrinho.selection_set(i)
-                self.listbox_carrinho.activate(i)
-                self.listbox_carrinho.see(i)
-                break
+        self.marcar_carrinho_alterado(prod_id)
 
     def remover_carrinho(self):
         selecionado = self.listbox_carrinho.curselection()
@@ -568,28 +760,18 @@ class VendasFrame(ctk.CTkFrame):
         prod_id = int(match.group(1))
 
         if prod_id in self.carrinho:
-            self.carrinho[prod_id]["quantidade"] -= 1
-            if self.carrinho[prod_id]["quantidade"] <= 0:
+            nova_quantidade = self.carrinho[prod_id]["quantidade"] - 1
+            try:
+                reservar_estoque(prod_id, nova_quantidade)
+            except sqlite3.Error as e:
+                messagebox.showerror("Erro no Banco de Dados", f"Não foi possível liberar a reserva: {e}")
+                return
+
+            self.carrinho[prod_id]["quantidade"] = nova_quantidade
+            if nova_quantidade <= 0:
                 del self.carrinho[prod_id]
             
-            self.atualizar_carrinho_display()
-            self.atualizar_subtotal_label()
-            self.carregar_produtos()
-
-            # Tenta re-selecionar o item se ainda estiver no carrinho, ou o primeiro item
-            if prod_id in self.carrinho and self.listbox_carrinho.size() > 0:
-                for i in range(self.listbox_carrinho.size()):
-                    if f"ID:{prod_id:<4}" in self.listbox_carrinho.get(i):
-                        self.listbox_carrinho.selection_set(i)
-                        self.listbox_carrinho.activate(i)
-                        self.listbox_carrinho.see(i)
-                        break
-            elif self.listbox_carrinho.size() > 0:
-                self.listbox_carrinho.selection_set(0)
-                self.listbox_carrinho.activate(0)
-                self.listbox_carrinho.see(0)
-            else:
-                self.listbox_carrinho.selection_clear(0, tk.END)
+            self.marcar_carrinho_alterado(prod_id)
 
     def atualizar_carrinho_display(self):
         self.listbox_carrinho.delete(0, tk.END)
@@ -603,6 +785,16 @@ class VendasFrame(ctk.CTkFrame):
                 f"ID:{prod_id:<4} | {nome_formatado:<25} | Qtd: {item['quantidade']:<3} | R$ {subtotal:<7.2f}"
             )
 
+        # Re-seleciona o item alterado se ainda estiver no carrinho, ou o primeiro item
+        if self.item_em_foco is not None and self.carrinho:
+            ids = list(self.carrinho)
+            i = ids.index(self.item_em_foco) if self.item_em_foco in self.carrinho else 0
+            self.listbox_carrinho.selection_clear(0, tk.END)
+            self.listbox_carrinho.selection_set(i)
+            self.listbox_carrinho.activate(i)
+            self.listbox_carrinho.see(i)
+        self.item_em_foco = None
+
     def calcular_subtotal(self):
         total = sum(item["preco"] * item["quantidade"] for item in self.carrinho.values())
         return total
@@ -621,29 +813,8 @@ class VendasFrame(ctk.CTkFrame):
         if not confirmar:
             return
 
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         try:
-            for prod_id, item_carrinho in self.carrinho.items():
-                cursor.execute("SELECT estoque FROM produtos WHERE id=?", (prod_id,))
-                resultado = cursor.fetchone()
-                
-                if resultado is None:
-                    raise ValueError(f"Produto com ID {prod_id} não encontrado no banco de dados.")
-                
-                estoque_disponivel = resultado[0]
-                quantidade_pedida = item_carrinho["quantidade"]
-
-                if estoque_disponivel < quantidade_pedida:
-                    raise ValueError(f"Estoque insuficiente para '{item_carrinho['nome']}'. Disponível: {estoque_disponivel}.")
-                
-                cursor.execute(
-                    "UPDATE produtos SET estoque = estoque - ? WHERE id=?",
-                    (quantidade_pedida, prod_id)
-                )
-            
-            conn.commit()
+            registrar_venda(self.carrinho)
             
             try:
                 imprimir_cupom_escpos_raw(self.carrinho)
@@ -652,18 +823,12 @@ class VendasFrame(ctk.CTkFrame):
                 messagebox.showwarning("Venda Realizada, Impressão Falhou", f"Venda realizada com sucesso, mas houve um erro ao imprimir o cupom: {e}")
 
             self.carrinho.clear()
-            self.atualizar_carrinho_display()
-            self.atualizar_subtotal_label()
-            self.carregar_produtos()
+            self.marcar_carrinho_alterado()
 
         except ValueError as ve:
-            conn.rollback()
             messagebox.showwarning("Erro de Estoque", str(ve) + "\nTransação cancelada.")
         except sqlite3.Error as e:
-            conn.rollback()
             messagebox.showerror("Erro no Banco de Dados", f"Não foi possível finalizar a venda: {e}")
-        finally:
-            conn.close()
 
 class TelaInicial(ctk.CTkFrame):
     def __init__(self, master, mostrar_cadastro, mostrar_vendas):
@@ -706,31 +871,46 @@ class Aplicativo(ctk.CTk):
         
 
         criar_tabela()
+        threading.Thread(target=manutencao_banco, daemon=True).start()
+
+        self.agendador = AgendadorTela(self)
+        self.bind("<F12>", lambda event: print(self.agendador.relatorio()))
 
         self.tela_inicial = TelaInicial(self, self.mostrar_cadastro, self.mostrar_vendas)
         self.cadastro_frame = CadastroFrame(self, self.mostrar_tela_inicial)
         self.vendas_frame = VendasFrame(self, self.mostrar_tela_inicial)
 
         self.tela_inicial.pack(fill='both', expand=True)
+        self.protocol("WM_DELETE_WINDOW", self.fechar)
+
+    def fechar(self):
+        try:
+            liberar_reservas()
+        except sqlite3.Error as e:
+            print(f"Erro ao liberar reservas: {e}")
+        self.destroy()
 
     def mostrar_cadastro(self):
         self.vendas_frame.pack_forget()
         self.tela_inicial.pack_forget()
-        self.cadastro_frame.listar_produtos()
+        self.agendador.marcar(self.cadastro_frame.listar_produtos)
         self.cadastro_frame.pack(fill='both', expand=True, padx=40, pady=40)
+        self.agendador.mostrar(self.cadastro_frame)
 
     def mostrar_vendas(self):
         self.tela_inicial.pack_forget()
         self.cadastro_frame.pack_forget()
-        self.vendas_frame.carregar_produtos()
-        self.vendas_frame.atualizar_carrinho_display()
+        self.vendas_frame.marcar_carrinho_alterado()
         self.vendas_frame.pack(fill='both', expand=True, padx=40, pady=40)
+        self.agendador.mostrar(self.vendas_frame)
 
     def mostrar_tela_inicial(self):
         self.cadastro_frame.pack_forget()
         self.vendas_frame.pack_forget()
         self.tela_inicial.pack(fill='both', expand=True)
+        self.agendador.mostrar(self.tela_inicial)
 
 if __name__ == "__main__":
+    threading.Thread(target=ler_peso_esp32, daemon=True).start()
     app = Aplicativo()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,118 @@
+import sqlite3
+import bisect
+
+import banco
+
+class ModeloProdutos:
+    """Cópia em memória da tabela produtos com índices pré-ordenados.
+
+    Cada índice é uma lista ordenada de chaves (valor, id) mantida com bisect,
+    assim inserções, edições e exclusões não exigem reordenar a tabela inteira.
+    """
+
+    CAMPOS_ORDENACAO = ("nome", "preco", "estoque")
+
+    def __init__(self):
+        self.produtos = {}
+        self.indices = {campo: [] for campo in self.CAMPOS_ORDENACAO}
+
+    @staticmethod
+    def chave(produto, campo):
+        prod_id, nome, preco, estoque = produto
+        if campo == "nome":
+            return (nome.lower(), prod_id)
+        if campo == "preco":
+            return (preco, prod_id)
+        return (estoque, prod_id)
+
+    def carregar(self):
+        conn = sqlite3.connect(banco.DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, nome, preco, estoque FROM produtos")
+        resultados = cursor.fetchall()
+        conn.close()
+
+        self.produtos = {p[0]: p for p in resultados}
+        for campo in self.CAMPOS_ORDENACAO:
+            self.indices[campo] = sorted(self.chave(p, campo) for p in resultados)
+
+    def obter(self, prod_id):
+        return self.produtos.get(prod_id)
+
+    def inserir(self, produto):
+        self.produtos[produto[0]] = produto
+        for campo, indice in self.indices.items():
+            bisect.insort(indice, self.chave(produto, campo))
+
+    def remover(self, prod_id):
+        produto = self.produtos.pop(prod_id, None)
+        if produto is None:
+            return None
+        for campo, indice in self.indices.items():
+            chave = self.chave(produto, campo)
+            pos = bisect.bisect_left(indice, chave)
+            if pos < len(indice) and indice[pos] == chave:
+                del indice[pos]
+        return produto
+
+    def atualizar(self, produto):
+        antigo = self.remover(produto[0])
+        self.inserir(produto)
+        return antigo
+
+    def chaves_ordenadas(self, campo, filtro=""):
+        indice = self.indices[campo]
+        if not filtro:
+            return list(indice)
+        produtos = self.produtos
+        return [c for c in indice if filtro in produtos[c[-1]][1].lower()]
+
+class VisaoProdutos:
+    """Recorte ordenado e filtrado do modelo, como a lista da tela o exibe.
+
+    Guarda as chaves visíveis sempre em ordem crescente; na ordem decrescente
+    só a posição na lista é espelhada, então as atualizações seguem com bisect.
+    """
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.campo_ordem = "nome"
+        self.ordem_decrescente = False
+        self.filtro = ""
+        self.chaves = []
+
+    def aplicar(self, filtro=""):
+        """Refaz o recorte e retorna os ids na ordem em que aparecem na lista."""
+        self.filtro = filtro
+        self.chaves = self.modelo.chaves_ordenadas(self.campo_ordem, filtro)
+        ids = [c[-1] for c in self.chaves]
+        if self.ordem_decrescente:
+            ids.reverse()
+        return ids
+
+    def posicao_na_lista(self, pos):
+        if self.ordem_decrescente:
+            return len(self.chaves) - 1 - pos
+        return pos
+
+    def id_na_linha(self, indice):
+        return self.chaves[self.posicao_na_lista(indice)][-1]
+
+    def remover(self, produto):
+        """Tira o produto do recorte e retorna a linha que ele ocupava, ou None."""
+        chave = ModeloProdutos.chave(produto, self.campo_ordem)
+        pos = bisect.bisect_left(self.chaves, chave)
+        if pos < len(self.chaves) and self.chaves[pos] == chave:
+            indice = self.posicao_na_lista(pos)
+            del self.chaves[pos]
+            return indice
+        return None
+
+    def inserir(self, produto):
+        """Põe o produto no recorte se passar no filtro e retorna a linha nova, ou None."""
+        if self.filtro not in produto[1].lower():
+            return None
+        chave = ModeloProdutos.chave(produto, self.campo_ordem)
+        pos = bisect.bisect_left(self.chaves, chave)
+        self.chaves.insert(pos, chave)
+        return self.posicao_na_lista(pos)
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import banco
+
+
+def mes_anterior(ano, mes, n):
+    for _ in range(n):
+        ano, mes = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    return ano, mes
+
+
+def preparar_vendas(tmp_path, monkeypatch):
+    monkeypatch.setattr(banco, "DB_PATH", str(tmp_path / "banco.db"))
+    monkeypatch.setattr(banco, "PASTA_ARQUIVO", str(tmp_path / "arquivo_vendas"))
+    banco.criar_tabela()
+
+    hoje = datetime.now()
+    vendas = []
+    for n in range(6):
+        ano, mes = mes_anterior(hoje.year, hoje.month, n)
+        for dia in (1, 15, 28):
+            vendas.append(f"{ano:04d}-{mes:02d}-{dia:02d} 12:00:00")
+
+    conn = sqlite3.connect(banco.DB_PATH)
+    for i, data_hora in enumerate(vendas, start=1):
+        conn.execute("INSERT INTO vendas (id, data_hora, total) VALUES (?, ?, ?)", (i, data_hora, 2.0))
+        conn.execute("INSERT INTO itens_venda (venda_id, produto_id, quantidade, subtotal) VALUES (?, ?, ?, ?)",
+                     (i, 1 + i % 2, 1, 2.0))
+    conn.commit()
+    conn.close()
+    return sorted(vendas)
+
+
+def test_arquivamento_mantem_as_vendas_consultaveis(tmp_path, monkeypatch):
+    vendas = preparar_vendas(tmp_path, monkeypatch)
+    inicio, fim = "2000-01-01 00:00:00", "2999-01-01 00:00:00"
+
+    meses = banco.arquivar_vendas(meses_quentes=2)
+
+    assert len(meses) == 4
+    assert all(os.path.exists(banco.caminho_particao(m)) for m in meses)
+    conn = sqlite3.connect(banco.DB_PATH)
+    assert conn.execute("SELECT COUNT(*) FROM vendas").fetchone()[0] == 6
+    assert conn.execute("SELECT COUNT(*) FROM itens_venda").fetchone()[0] == 6
+    conn.close()
+
+    assert [v[1] for v in banco.consultar_vendas(inicio, fim)] == vendas
+    assert banco.vendas_por_produto(inicio, fim) == {1: (9, 18.0), 2: (9, 18.0)}
+    # Repetir não duplica nada
+    assert banco.arquivar_vendas(meses_quentes=2) == []
+    assert len(banco.consultar_vendas(inicio, fim)) == len(vendas)
+
+
+def test_particoes_no_intervalo_respeita_fim_exclusivo(tmp_path, monkeypatch):
+    preparar_vendas(tmp_path, monkeypatch)
+    meses = sorted(banco.arquivar_vendas(meses_quentes=1))
+    primeiro, segundo = meses[0], meses[1]
+
+    particoes = banco.particoes_no_intervalo(f"{primeiro}-01 00:00:00", f"{segundo}-01 00:00:00")
+    assert particoes == [banco.caminho_particao(primeiro)]
+
+    particoes = banco.particoes_no_intervalo(f"{primeiro}-01 00:00:00", f"{segundo}-01 00:00:01")
+    assert particoes == [banco.caminho_particao(primeiro), banco.caminho_particao(segundo)]
@@ -0,0 +1,124 @@
+import random
+import sqlite3
+import time
+
+import pytest
+
+import banco
+from modelo_produtos import ModeloProdutos, VisaoProdutos
+
+
+def preparar_produtos(tmp_path, monkeypatch, quantidade, semente=0):
+    monkeypatch.setattr(banco, "DB_PATH", str(tmp_path / "banco.db"))
+    banco.criar_tabela()
+    aleatorio = random.Random(semente)
+    conn = sqlite3.connect(banco.DB_PATH)
+    conn.executemany(
+        "INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)",
+        [(f"Produto {aleatorio.randint(0, 10 ** 6)}", round(aleatorio.uniform(0, 100), 2), aleatorio.randint(0, 500))
+         for _ in range(quantidade)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def linhas_da_visao(visao, ids):
+    return [visao.modelo.obter(i) for i in ids]
+
+
+@pytest.mark.parametrize("campo", ModeloProdutos.CAMPOS_ORDENACAO)
+@pytest.mark.parametrize("decrescente", [False, True])
+@pytest.mark.parametrize("filtro", ["", "12"])
+def test_atualizacoes_incrementais_batem_com_a_visao_refeita(tmp_path, monkeypatch, campo, decrescente, filtro):
+    preparar_produtos(tmp_path, monkeypatch, 2000)
+    modelo = ModeloProdutos()
+    modelo.carregar()
+    visao = VisaoProdutos(modelo)
+    visao.campo_ordem = campo
+    visao.ordem_decrescente = decrescente
+    lista = linhas_da_visao(visao, visao.aplicar(filtro))
+
+    def atualizar_linha(antigo, novo):
+        # Mesmos passos que CadastroFrame.atualizar_linha faz no Listbox
+        if antigo is not None:
+            indice = visao.remover(antigo)
+            if indice is not None:
+                del lista[indice]
+        if novo is not None:
+            indice = visao.inserir(novo)
+            if indice is not None:
+                lista.insert(indice, novo)
+
+    aleatorio = random.Random(1)
+    proximo_id = max(modelo.produtos) + 1
+    for _ in range(300):
+        operacao = aleatorio.random()
+        prod_id = aleatorio.choice(list(modelo.produtos))
+        if operacao < 0.5:
+            novo = (prod_id, f"Produto {aleatorio.randint(0, 10 ** 6)}", aleatorio.uniform(0, 100), aleatorio.randint(0, 500))
+            atualizar_linha(modelo.atualizar(novo), novo)
+        elif operacao < 0.75:
+            atualizar_linha(modelo.remover(prod_id), None)
+        else:
+            novo = (proximo_id, f"Produto 12{aleatorio.randint(0, 99)}", 1.0, 3)
+            proximo_id += 1
+            modelo.inserir(novo)
+            atualizar_linha(None, novo)
+
+    chaves_incrementais = list(visao.chaves)
+    assert lista == linhas_da_visao(visao, visao.aplicar(filtro))
+    assert chaves_incrementais == visao.chaves
+    for indice, produto in enumerate(lista):
+        assert visao.id_na_linha(indice) == produto[0]
+
+
+def test_ordem_decrescente_e_filtro(tmp_path, monkeypatch):
+    monkeypatch.setattr(banco, "DB_PATH", str(tmp_path / "banco.db"))
+    banco.criar_tabela()
+    conn = sqlite3.connect(banco.DB_PATH)
+    conn.executemany("INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)",
+                     [("Feijão", 8.5, 30), ("arroz", 5.0, 10), ("Açúcar", 4.2, 7)])
+    conn.commit()
+    conn.close()
+
+    modelo = ModeloProdutos()
+    modelo.carregar()
+    visao = VisaoProdutos(modelo)
+    assert visao.aplicar() == [2, 3, 1]
+
+    visao.campo_ordem = "estoque"
+    visao.ordem_decrescente = True
+    assert visao.aplicar() == [1, 2, 3]
+    assert visao.id_na_linha(0) == 1
+    assert visao.aplicar("ar") == [2, 3]
+    assert visao.id_na_linha(1) == 3
+
+
+def test_carregar_e_exibir_100_mil_produtos(tmp_path, monkeypatch):
+    preparar_produtos(tmp_path, monkeypatch, 100_000)
+    modelo = ModeloProdutos()
+    visao = VisaoProdutos(modelo)
+
+    inicio = time.perf_counter()
+    modelo.carregar()
+    ids = visao.aplicar()
+    tempo_carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    visao.aplicar("12")
+    tempo_filtro = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for prod_id in ids[:200]:
+        produto = modelo.obter(prod_id)
+        novo = (prod_id, produto[1], produto[2], produto[3] + 1)
+        visao.remover(modelo.atualizar(novo))
+        visao.inserir(novo)
+    tempo_edicao = (time.perf_counter() - inicio) / 200
+
+    print(f"carga+visão {tempo_carga:.2f} s, filtro {tempo_filtro * 1000:.0f} ms, "
+          f"edição {tempo_edicao * 1000:.2f} ms por linha")
+    assert len(ids) == 100_000
+    assert tempo_carga < 5.0
+    assert tempo_filtro < 1.0
+    assert tempo_edicao < 0.05
@@ -0,0 +1,56 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import banco
+
+
+class RelogioFalso(datetime):
+    agora = datetime(2024, 1, 1)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.agora
+
+
+def preparar_banco(tmp_path, monkeypatch, estoque):
+    monkeypatch.setattr(banco, "DB_PATH", str(tmp_path / "banco.db"))
+    monkeypatch.setattr(banco, "datetime", RelogioFalso)
+    monkeypatch.setattr(banco, "SNAPSHOT_A_CADA", 20)
+    RelogioFalso.agora = datetime(2024, 1, 1)
+    banco.criar_tabela()
+    conn = sqlite3.connect(banco.DB_PATH)
+    conn.execute("INSERT INTO produtos (nome, preco, estoque) VALUES ('Arroz', 1.0, ?)", (estoque,))
+    conn.commit()
+    conn.close()
+    banco.criar_tabela()
+
+
+def test_estoque_em_reconstroi_o_historico_antes_e_depois_da_compactacao(tmp_path, monkeypatch):
+    preparar_banco(tmp_path, monkeypatch, 1000)
+    historico = []
+    estoque = 1000
+    for i in range(300):
+        RelogioFalso.agora += timedelta(hours=6)
+        quantidade = (5, -3, -1, 2)[i % 4]
+        banco.registrar_movimentos([(1, "entrada" if quantidade > 0 else "quebra", quantidade, None)])
+        estoque += quantidade
+        historico.append((RelogioFalso.agora, estoque))
+
+    for momento, esperado in historico:
+        assert banco.estoque_em(1, momento) == esperado
+
+    banco.compactar_movimentos(30)
+    corte = RelogioFalso.agora - timedelta(days=30)
+    for momento, esperado in historico:
+        if momento >= corte:
+            assert banco.estoque_em(1, momento) == esperado
+
+
+def test_movimento_de_produto_inexistente_nao_entra_no_livro(tmp_path, monkeypatch):
+    preparar_banco(tmp_path, monkeypatch, 10)
+    aplicados = banco.registrar_movimentos([(1, "entrada", 5, None), (99, "entrada", 5, None)])
+
+    assert aplicados == [(1, "entrada", 5, None)]
+    conn = sqlite3.connect(banco.DB_PATH)
+    assert conn.execute("SELECT produto_id FROM movimentos_estoque").fetchall() == [(1,)]
+    conn.close()
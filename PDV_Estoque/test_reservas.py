@@ -0,0 +1,86 @@
+import multiprocessing
+import random
+import sqlite3
+import time
+
+import banco
+
+CAIXAS = 16
+PRODUTOS = 5
+ESTOQUE_INICIAL = 100
+CARRINHOS_POR_CAIXA = 40
+LATENCIA_MAXIMA_S = 2.0
+
+
+def simular_caixa(db_path, numero, fila):
+    """Um caixa enche carrinhos aleatórios e finaliza cada um, medindo a espera por operação."""
+    banco.DB_PATH = db_path
+    caixa = f"caixa-{numero}"
+    aleatorio = random.Random(numero)
+    vendidos = {}
+    negados = 0
+    pior_latencia = 0.0
+
+    for _ in range(CARRINHOS_POR_CAIXA):
+        carrinho = {}
+        for _ in range(aleatorio.randint(1, 4)):
+            prod_id = aleatorio.randint(1, PRODUTOS)
+            quantidade = carrinho.get(prod_id, {}).get("quantidade", 0) + 1
+            inicio = time.perf_counter()
+            reservado, _ = banco.reservar_estoque(prod_id, quantidade, caixa)
+            pior_latencia = max(pior_latencia, time.perf_counter() - inicio)
+            if reservado:
+                carrinho[prod_id] = {"nome": str(prod_id), "preco": 1.0, "quantidade": quantidade}
+            else:
+                negados += 1
+
+        if carrinho:
+            inicio = time.perf_counter()
+            banco.registrar_venda(carrinho, caixa)
+            pior_latencia = max(pior_latencia, time.perf_counter() - inicio)
+            for prod_id, item in carrinho.items():
+                vendidos[prod_id] = vendidos.get(prod_id, 0) + item["quantidade"]
+
+    fila.put((vendidos, negados, pior_latencia))
+
+
+def test_caixas_concorrentes_nao_vendem_alem_do_estoque(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "banco.db")
+    monkeypatch.setattr(banco, "DB_PATH", db_path)
+    banco.criar_tabela()
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)",
+                     [(f"Produto {i}", 1.0, ESTOQUE_INICIAL) for i in range(PRODUTOS)])
+    conn.commit()
+    conn.close()
+
+    fila = multiprocessing.Queue()
+    processos = [multiprocessing.Process(target=simular_caixa, args=(db_path, i, fila))
+                 for i in range(CAIXAS)]
+    for processo in processos:
+        processo.start()
+    resultados = [fila.get(timeout=120) for _ in processos]
+    for processo in processos:
+        processo.join()
+    assert all(processo.exitcode == 0 for processo in processos)
+
+    vendidos = {}
+    for vendidos_caixa, _, _ in resultados:
+        for prod_id, quantidade in vendidos_caixa.items():
+            vendidos[prod_id] = vendidos.get(prod_id, 0) + quantidade
+
+    conn = sqlite3.connect(db_path)
+    estoque = dict(conn.execute("SELECT id, estoque FROM produtos"))
+    itens = dict(conn.execute("SELECT produto_id, SUM(quantidade) FROM itens_venda GROUP BY produto_id"))
+    reservas = conn.execute("SELECT COUNT(*) FROM reservas").fetchone()[0]
+    conn.close()
+
+    for prod_id in range(1, PRODUTOS + 1):
+        assert estoque[prod_id] >= 0
+        assert estoque[prod_id] + vendidos.get(prod_id, 0) == ESTOQUE_INICIAL
+        assert itens.get(prod_id, 0) == vendidos.get(prod_id, 0)
+    # A demanda simulada supera o estoque, então tudo deve ter sido vendido
+    assert sum(vendidos.values()) == PRODUTOS * ESTOQUE_INICIAL
+    assert reservas == 0
+    # Sem comboio de travas: nenhuma operação espera perto do timeout de 10 s do sqlite
+    assert max(pior for _, _, pior in resultados) < LATENCIA_MAXIMA_S